@@ -130,7 +130,7 @@ def _cached_incident_context(incident_id: str) -> dict:
 def _load_timeline():
     try:
         ctx = _cached_incident_context(incident_id)
-        st.session_state["timeline"] = ctx.get("timeline", [])
+        st.session_state["timeline"] = [row._asdict() for row in ctx.get("timeline", [])]
         st.session_state["timeline_incident_id"] = incident_id
     except Exception as e:
         st.error(f"Failed to load timeline: {e}")
@@ -151,7 +151,8 @@ def _run_narrator_cached(incident_id: str) -> dict:
 @st.cache_data(ttl=300, show_spinner=True)
 def _run_audit_cached(incident_id: str, narrator_report_json_str: str) -> dict:
     from scripts.auditor_runner import run_audit
-    report = json.loads(narrator_report_json_str)
+    from scripts.json_io import loads
+    report = loads(narrator_report_json_str)
     return run_audit(incident_id, report)
 
 
@@ -195,7 +196,8 @@ def _run_audit(*, store: bool = False):
     if not report:
         out_path = REPO_ROOT / "out" / f"postmortem_{incident_id}.json"
         if out_path.exists():
-            report = json.loads(out_path.read_text(encoding="utf-8"))
+            from scripts.json_io import load_json
+            report = load_json(out_path)
             st.session_state["narrator"] = report
         else:
             report = _run_narrator_cached(incident_id)
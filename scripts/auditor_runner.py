@@ -1,17 +1,19 @@
 #!/usr/bin/env python3
 """Run Integrity Auditor: validate narrator report claims against timeline, write audit JSON + MD."""
 import argparse
-import json
 import re
 import sys
+from collections import defaultdict
 from datetime import datetime, timezone
+from itertools import chain
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
 sys.path.insert(0, str(Path(__file__).resolve().parent))
 
-from context_contract import load_incident_context
-from es_client import get_client, index_name
+from context_contract import ChangeRecord, load_change_records, load_incident_context
+from es_client import get_client
+from json_io import atomic_write, dump_json, load_json, loads
 
 REPO_ROOT = Path(__file__).resolve().parent.parent
 OUT_DIR = REPO_ROOT / "out"
@@ -21,7 +23,7 @@ ESQL_PATH = REPO_ROOT / "tools" / "get_incident_context.esql"
 
 def load_schema() -> dict:
     """Load JSON Schema from docs/auditor_output_schema.json."""
-    return json.loads(SCHEMA_PATH.read_text(encoding="utf-8"))
+    return load_json(SCHEMA_PATH)
 
 OVERSTRONG_PATTERN = re.compile(
     r"\b(confirmed|proves?|root cause|introduced|caused)\b", re.IGNORECASE
@@ -29,22 +31,132 @@ OVERSTRONG_PATTERN = re.compile(
 POLICY_PATTERN = re.compile(
     r"\b(approval process|followed approvals|in change window)\b", re.IGNORECASE
 )
+# Enriched change summary suffix "(approvals 1/2, window=..., author=...)" and its approvals part
+SUMMARY_SUFFIX_PATTERN = re.compile(r"\(([^)]+)\)\s*$")
+APPROVALS_PATTERN = re.compile(r"approvals\s+(\d+)/(\d+)")
+# Per-claim check bits; bit order is the order reasons and findings are reported in.
+MISSING_REF = 1
+OVERSTRONG = 2
+POLICY = 4
+OVERCONFIDENT = 8
+FINDING_TYPES = (
+    "missing_evidence_ref",
+    "overstrong_causality",
+    "governance_violation_detected",
+    "overconfident_claim",
+)
+REASONS = (
+    "Evidence refs not in timeline",
+    "Language overstates causality.",
+    "Policy compliance not explicitly supported by timeline.",
+    "High confidence with indirect or multi-ref evidence.",
+)
+# (delta, cap) per bit: a challenged claim's confidence becomes min(original - delta, cap).
+_CONF_RULES = {OVERSTRONG: (0.1, 0.88), POLICY: (0.08, 0.88), OVERCONFIDENT: (0.1, 0.82)}
+
+
+def _conf_rule(mask: int) -> Tuple[float, float, float]:
+    """(delta, cap, floor) for a mask: adjusted = max(floor, min(original - delta, cap))."""
+    if not mask:
+        return 0.02, float("inf"), 0.0  # validated
+    if mask & MISSING_REF:
+        return 0.2, float("inf"), 0.5
+    return (
+        max(d for bit, (d, _) in _CONF_RULES.items() if mask & bit),
+        min(cap for bit, (_, cap) in _CONF_RULES.items() if mask & bit),
+        float("-inf"),
+    )
+
+
+# Lookup tables indexed by mask, so the per-claim path does no joins or min() chains.
+_REASON_BY_MASK = tuple(
+    "; ".join(REASONS[i] for i in range(len(REASONS)) if mask & (1 << i)) for mask in range(16)
+)
+_CONF_BY_MASK = tuple(_conf_rule(mask) for mask in range(16))
+
+
+def adjust_confidence(conf_orig: float, mask: int) -> float:
+    """Adjusted (unrounded) confidence for a claim with the given check mask (0 = validated)."""
+    delta, cap, floor = _CONF_BY_MASK[mask]
+    return max(floor, min(conf_orig - delta, cap))
+
+
+# Weaker replacement per OVERSTRONG_PATTERN match (keyed by lowercased match).
+WEAKEN_MAP = {
+    "confirmed": "consistent with",
+    "prove": "may indicate",
+    "proves": "may indicate",
+    "root cause": "possible factor",
+    "caused": "correlates with",
+    "introduced": "associated with",
+}
+
+
+def _weaken_match(m: "re.Match[str]") -> str:
+    return WEAKEN_MAP[m.group(1).lower()]
 
 
 def weaken_statement(statement: str) -> str:
     """Produce a weaker, evidence-aligned rewrite (no new refs)."""
-    s = statement
-    s = re.sub(r"\bconfirmed\b", "consistent with", s, flags=re.IGNORECASE)
-    s = re.sub(r"\bproves?\b", "may indicate", s, flags=re.IGNORECASE)
-    s = re.sub(r"\broot cause\b", "possible factor", s, flags=re.IGNORECASE)
-    s = re.sub(r"\bcaused\b", "correlates with", s, flags=re.IGNORECASE)
-    s = re.sub(r"\bintroduced\b", "associated with", s, flags=re.IGNORECASE)
+    s = OVERSTRONG_PATTERN.sub(_weaken_match, statement)
     return s if s != statement else statement + " (evidence supports correlation.)"
 
 
+def _challenged_entry(
+    claim_id: str,
+    statement: str,
+    evidence_refs: List[str],
+    missing_refs: List[str],
+    reason: str,
+    suggested_rewrite: str,
+    conf_orig: float,
+    mask: int,
+) -> dict:
+    """One challenged_claims entry; shared by audit_claims and its empty-timeline short-circuit."""
+    return {
+        "claim_id": claim_id,
+        "statement": statement,
+        "evidence_refs": evidence_refs,
+        "missing_refs": list(missing_refs),
+        "reason": reason,
+        "suggested_rewrite": suggested_rewrite,
+        "confidence_original": conf_orig,
+        "confidence_adjusted": round(adjust_confidence(conf_orig, mask), 2),
+    }
+
+
+def _audit_claims_without_timeline(claims: List[dict]) -> Tuple[List[dict], List[dict], List[dict]]:
+    """Empty ref_set: no claim can be verified, so challenge all as missing evidence without pattern checks."""
+    challenged = []
+    findings = []
+    for c in claims:
+        claim_id = c.get("claim_id", "")
+        evidence_refs = list(c.get("evidence_refs") or [])
+        conf_orig = float(c.get("confidence", 0.5))
+        reason = f"{REASONS[0]}: {', '.join(evidence_refs)}" if evidence_refs else "No timeline evidence."
+        challenged.append(_challenged_entry(
+            claim_id,
+            (c.get("statement") or "").strip(),
+            evidence_refs,
+            evidence_refs,
+            reason,
+            "Claim cannot be verified; no evidence refs in timeline.",
+            conf_orig,
+            MISSING_REF,
+        ))
+        findings.append({
+            "finding_type": FINDING_TYPES[0],
+            "message": f"{claim_id}: {reason}",
+            "related_claim_ids": [claim_id],
+        })
+    return [], challenged, findings
+
+
 def audit_claims(
-    claims: List[dict], ref_set: set
+    claims: List[dict], ref_set: frozenset
 ) -> Tuple[List[dict], List[dict], List[dict]]:
+    if not ref_set:
+        return _audit_claims_without_timeline(claims)
     validated = []
     challenged = []
     findings = []
@@ -54,65 +166,50 @@ def audit_claims(
         evidence_refs = list(c.get("evidence_refs") or [])
         conf_orig = float(c.get("confidence", 0.5))
         missing_refs = [r for r in evidence_refs if r not in ref_set]
-        reasons = []
-        finding_types = []
-        conf_adjusted = conf_orig
+        mask = 0
         suggested_rewrite = ""
 
         if missing_refs:
-            reasons.append(f"Evidence refs not in timeline: {', '.join(missing_refs)}")
-            finding_types.append("missing_evidence_ref")
-            conf_adjusted = max(0.5, conf_orig - 0.2)
+            mask = MISSING_REF
+            reason = f"{REASONS[0]}: {', '.join(missing_refs)}"
             valid_refs = [r for r in evidence_refs if r in ref_set]
-            suggested_rewrite = statement
             if valid_refs:
                 suggested_rewrite = statement + f" (Refs in timeline: {', '.join(valid_refs)}.)"
             else:
                 suggested_rewrite = "Claim cannot be verified; no evidence refs in timeline."
         else:
             if OVERSTRONG_PATTERN.search(statement):
-                reasons.append("Language overstates causality.")
-                finding_types.append("overstrong_causality")
-                conf_adjusted = min(conf_adjusted, conf_orig - 0.1, 0.88)
+                mask |= OVERSTRONG
                 suggested_rewrite = weaken_statement(statement)
             if POLICY_PATTERN.search(statement):
-                reasons.append("Policy compliance not explicitly supported by timeline.")
-                finding_types.append("governance_violation_detected")
-                conf_adjusted = min(conf_adjusted, conf_orig - 0.08, 0.88)
+                mask |= POLICY
                 if not suggested_rewrite:
                     suggested_rewrite = statement + " (Timeline does not explicitly show compliance.)"
             if conf_orig >= 0.90 and ("may " in statement.lower() or len(evidence_refs) > 2):
-                finding_types.append("overconfident_claim")
-                reasons.append("High confidence with indirect or multi-ref evidence.")
-                conf_adjusted = min(conf_adjusted, 0.82, conf_orig - 0.1)
-                if not suggested_rewrite:
-                    suggested_rewrite = statement
-
-        if missing_refs or reasons:
-            challenged.append({
-                "claim_id": claim_id,
-                "statement": statement,
-                "evidence_refs": evidence_refs,
-                "missing_refs": missing_refs,
-                "reason": "; ".join(reasons) if reasons else "Missing evidence refs.",
-                "suggested_rewrite": suggested_rewrite or statement,
-                "confidence_original": conf_orig,
-                "confidence_adjusted": round(conf_adjusted, 2),
-            })
-            for ft in finding_types:
-                findings.append({
-                    "finding_type": ft,
-                    "message": f"{claim_id}: " + (reasons[0] if reasons else "missing refs"),
-                    "related_claim_ids": [claim_id],
-                })
+                mask |= OVERCONFIDENT
+            reason = _REASON_BY_MASK[mask]
+
+        if mask:
+            challenged.append(_challenged_entry(
+                claim_id, statement, evidence_refs, missing_refs, reason, suggested_rewrite or statement, conf_orig, mask
+            ))
+            # Every finding for a claim carries the claim's first (lowest-bit) reason.
+            first_reason = reason if mask & MISSING_REF else REASONS[(mask & -mask).bit_length() - 1]
+            message = f"{claim_id}: {first_reason}"
+            for i in range(len(FINDING_TYPES)):
+                if mask & (1 << i):
+                    findings.append({
+                        "finding_type": FINDING_TYPES[i],
+                        "message": message,
+                        "related_claim_ids": [claim_id],
+                    })
         else:
-            conf_adjusted = max(0.0, conf_orig - 0.02)
             validated.append({
                 "claim_id": claim_id,
                 "statement": statement,
                 "evidence_refs": evidence_refs,
                 "confidence_original": conf_orig,
-                "confidence_adjusted": round(conf_adjusted, 2),
+                "confidence_adjusted": round(adjust_confidence(conf_orig, 0), 2),
                 "notes": "All refs in timeline; no over-strong language.",
             })
 
@@ -123,7 +220,7 @@ def parse_change_summary_suffix(summary: str) -> Optional[Dict[str, Any]]:
     """Parse enriched suffix '(approvals 1/2, window=..., author=...)' from timeline row summary. Returns dict or None."""
     if not summary or "(" not in summary or ")" not in summary:
         return None
-    match = re.search(r"\(([^)]+)\)\s*$", summary.strip())
+    match = SUMMARY_SUFFIX_PATTERN.search(summary.strip())
     if not match:
         return None
     inner = match.group(1).strip()
@@ -133,7 +230,7 @@ def parse_change_summary_suffix(summary: str) -> Optional[Dict[str, Any]]:
             continue
         if part.startswith("approvals ") and "/" in part:
             try:
-                a, b = re.search(r"approvals\s+(\d+)/(\d+)", part).groups()
+                a, b = APPROVALS_PATTERN.search(part).groups()
                 out["approvals_observed"] = int(a)
                 out["approvals_required"] = int(b)
             except (AttributeError, ValueError):
@@ -160,10 +257,22 @@ def compute_score(findings: List[dict]) -> int:
     return max(0, score)
 
 
+def claim_ids_by_ref(claims: List[dict]) -> Dict[str, List[str]]:
+    """Map each evidence ref to the claim_ids citing it, in claim order."""
+    out: Dict[str, List[str]] = defaultdict(list)
+    for c in claims:
+        claim_id = c.get("claim_id", "")
+        for ref in c.get("evidence_refs") or []:
+            out[ref].append(claim_id)
+    return out
+
+
 def decision_integrity_check(
-    timeline: List[dict], claims: List[dict], client, report: Optional[dict] = None
+    changes: List[ChangeRecord], claims_by_ref: Dict[str, List[str]], report: Optional[dict] = None
 ) -> Tuple[List[dict], int, int]:
-    """Fetch change docs from ES; add findings for approval gap / out_of_window; return (findings, score, penalty_total).
+    """Add findings for approval gap / out_of_window on Deploy/Rollback change records (see
+    load_change_records); return (findings, score, penalty_total).
+    claims_by_ref maps evidence ref -> citing claim_ids (see claim_ids_by_ref).
     If report is provided, use report.timeline and report.decision_integrity_artifacts for evidence_refs and details."""
     findings = []
     score = 100
@@ -171,29 +280,14 @@ def decision_integrity_check(
     report_timeline = (report or {}).get("timeline", [])
     artifacts = (report or {}).get("decision_integrity_artifacts", [])
     dep_artifacts = [r for r in artifacts if isinstance(r, str) and r.startswith("DEP-")]
-    change_refs = [
-        r.get("ref") for r in timeline
-        if r.get("ref")
-        and (r.get("kind") == "change")
-        and ("Deploy" in (r.get("summary") or "") or "Rollback" in (r.get("summary") or ""))
-    ]
-    claim_ids_by_ref = {}
-    for c in claims:
-        for ref in c.get("evidence_refs") or []:
-            claim_ids_by_ref.setdefault(ref, []).append(c.get("claim_id", ""))
-    idx = index_name("changes")
-    for ref in change_refs:
-        try:
-            doc = client.get(index=idx, id=ref)
-            src = doc.get("_source") or {}
-        except Exception:
-            continue
-        req = src.get("approvals_required")
-        obs = src.get("approvals_observed")
-        window = src.get("change_window")
+    for change in changes:
+        ref = change.ref
+        req = change.approvals_required
+        obs = change.approvals_observed
+        window = change.change_window
         if req is None and obs is None and window is None:
             continue
-        related = claim_ids_by_ref.get(ref, ["CLM-001"])
+        related = claims_by_ref.get(ref, ["CLM-001"])
         approval_gap = False
         out_of_window = False
         if req is not None and obs is not None and int(req) > int(obs):
@@ -257,32 +351,45 @@ def render_markdown(data: dict) -> str:
         "| claim_id | reason | suggested_rewrite |",
         "| --- | --- | --- |",
     ])
-    for c in data.get("challenged_claims", []):
-        reason = (c.get("reason") or "").replace("|", " ")
-        rewrite = (c.get("suggested_rewrite") or "").replace("|", " ").replace("\n", " ")
-        lines.append(f"| {c.get('claim_id', '')} | {reason} | {rewrite} |")
+    lines.extend(
+        "| {} | {} | {} |".format(
+            c.get("claim_id", ""),
+            (c.get("reason") or "").replace("|", " "),
+            (c.get("suggested_rewrite") or "").replace("|", " ").replace("\n", " "),
+        )
+        for c in data.get("challenged_claims", [])
+    )
     lines.append("")
     lines.append("## Findings")
-    for f in data.get("integrity_findings", []):
-        lines.append(f"- **{f.get('finding_type', '')}**: {f.get('message', '')}")
+    lines.extend(
+        f"- **{f.get('finding_type', '')}**: {f.get('message', '')}"
+        for f in data.get("integrity_findings", [])
+    )
     return "\n".join(lines)
 
 
-def run_audit(incident_id: str, report: dict) -> dict:
-    """Run audit logic; return audit_data dict (no file I/O). Requires ES and ESQL_PATH for timeline."""
+def run_audit(incident_id: str, report: dict, client: Any = None) -> dict:
+    """Run audit logic; return audit_data dict (no file I/O). Requires ES and ESQL_PATH for timeline.
+    Pass client to reuse one ES client across pipeline steps (default: get_client())."""
     claims = report.get("claims", [])
     if not claims:
         raise ValueError("No claims in report")
     if not ESQL_PATH.exists():
         raise FileNotFoundError(f"ES|QL file not found: {ESQL_PATH}")
-    client = get_client()
+    if client is None:
+        client = get_client()
     context = load_incident_context(client, incident_id)
-    timeline = context["timeline"]
-    ref_set = set(context["ref_set"])
+    ref_set = frozenset(context["ref_set"])
     ref_set_size = len(ref_set)
     validated, challenged, findings = audit_claims(claims, ref_set)
+    try:
+        change_records = load_change_records(client, incident_id)
+    except Exception:
+        # Best effort, like the per-change lookups it replaced: a failed query (transient error, or a changes
+        # index without the approvals_* columns) means no change records rather than a failed audit.
+        change_records = []
     di_findings, decision_integrity_score, decision_integrity_penalty = decision_integrity_check(
-        timeline, claims, client, report
+        change_records, claim_ids_by_ref(claims), report
     )
     findings.extend(di_findings)
     overall_integrity_score = compute_score(findings)
@@ -297,7 +404,7 @@ def run_audit(incident_id: str, report: dict) -> dict:
         (sum(all_claims_adj) - sum(all_claims_orig)) / n if n else 0.0
     )
     report_id = report.get("report_id") or f"REPORT-{incident_id}-v1"
-    audited_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    audited_at = datetime.now(timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
     di_evidence_refs = []
     for f in di_findings:
         di_evidence_refs.extend(f.get("evidence_refs") or [])
@@ -327,7 +434,7 @@ def run_audit(incident_id: str, report: dict) -> dict:
 def _load_report(incident_id: str, report_arg: Optional[str]) -> dict:
     """Load narrator report from stdin (if not tty), --report path, or default out/postmortem_<id>.json."""
     if not sys.stdin.isatty():
-        report = json.loads(sys.stdin.read())
+        report = loads(sys.stdin.buffer.read())
         return report
     if report_arg:
         report_path = Path(report_arg)
@@ -338,7 +445,7 @@ def _load_report(incident_id: str, report_arg: Optional[str]) -> dict:
     if not report_path.exists():
         print(f"Report not found: {report_path}", file=sys.stderr)
         sys.exit(1)
-    return json.loads(report_path.read_text(encoding="utf-8"))
+    return load_json(report_path)
 
 
 def main() -> None:
@@ -347,6 +454,7 @@ def main() -> None:
     parser.add_argument("--report", default=None, help="Path to narrator JSON report (default: out/postmortem_<incident>.json)")
     parser.add_argument("--store", action="store_true", help="Upsert audit into postmortem_reports index")
     parser.add_argument("--exec", action="store_true", help="Executive demo mode")
+    parser.add_argument("--no-md", action="store_true", help="Skip writing the markdown audit (JSON only)")
     args = parser.parse_args()
     incident_id = args.incident
 
@@ -365,52 +473,59 @@ def main() -> None:
 
     OUT_DIR.mkdir(parents=True, exist_ok=True)
     json_path = OUT_DIR / f"audit_{incident_id}.json"
-    md_path = OUT_DIR / f"audit_{incident_id}.md"
-    json_path.write_text(json.dumps(audit_data, indent=2), encoding="utf-8")
-    md_path.write_text(render_markdown(audit_data), encoding="utf-8")
-
-    confidence_drift = round(
-        sum(c.get("confidence_original", 0) - c.get("confidence_adjusted", 0) for c in audit_data["validated_claims"])
-        + sum(c.get("confidence_original", 0) - c.get("confidence_adjusted", 0) for c in audit_data["challenged_claims"]),
-        4,
-    )
-    has_causality_issue = any(
-        f.get("finding_type") == "overstrong_causality"
-        for f in audit_data["integrity_findings"]
-    )
-    causality_strength = 100 if not has_causality_issue else 70
+    md_path = None if args.no_md else OUT_DIR / f"audit_{incident_id}.md"
+    dump_json(audit_data, json_path)
+    if md_path is not None:
+        atomic_write(md_path, render_markdown(audit_data).encode("utf-8"))
+
+    drift = 0
+    for c in chain(audit_data["validated_claims"], audit_data["challenged_claims"]):
+        drift += c.get("confidence_original", 0) - c.get("confidence_adjusted", 0)
+    confidence_drift = round(drift, 4)
+    causality_strength = 100
+    for f in audit_data["integrity_findings"]:
+        if f.get("finding_type") == "overstrong_causality":
+            causality_strength = 70
+            break
 
     if args.exec:
         audit = audit_data
-        print("\nEXECUTIVE INTEGRITY SUMMARY")
-        print(f"Incident: {audit['incident_id']}")
-        print(f"Integrity Score: {audit['overall_integrity_score']}/100")
-        print(f"Decision Integrity: {audit['decision_integrity_score']}/100")
-        print(f"Confidence Drift: -{confidence_drift}")
-        print(f"Causality Strength: {causality_strength}/100")
-        print(f"Findings: {len(audit['integrity_findings'])}")
+        sys.stdout.write("\n".join([
+            "\nEXECUTIVE INTEGRITY SUMMARY",
+            f"Incident: {audit['incident_id']}",
+            f"Integrity Score: {audit['overall_integrity_score']}/100",
+            f"Decision Integrity: {audit['decision_integrity_score']}/100",
+            f"Confidence Drift: -{confidence_drift}",
+            f"Causality Strength: {causality_strength}/100",
+            f"Findings: {len(audit['integrity_findings'])}",
+        ]) + "\n")
         return
 
-    print("AUDITOR_OK")
-    print(json_path)
-    print(md_path)
     overall = audit_data["overall_integrity_score"]
     decision = audit_data["decision_integrity_score"]
     gov_count = len(audit_data["integrity_findings"])
-    print("========================================")
-    print("POSTMORTEM INTEGRITY AUDIT")
-    print(f"Incident: {incident_id}")
-    print(f"Overall Integrity Score: {overall}/100")
-    print(f"Decision Integrity Score: {decision}/100")
-    print(f"Confidence Drift: -{confidence_drift}")
-    print(f"Governance Findings: {gov_count}")
-    print("========================================")
     if overall >= 90:
-        print("INTEGRITY STATUS: TRUSTED")
+        status = "TRUSTED"
     elif overall >= 70:
-        print("INTEGRITY STATUS: REVIEW ADVISED")
+        status = "REVIEW ADVISED"
     else:
-        print("INTEGRITY STATUS: AT RISK")
+        status = "AT RISK"
+    # Emit the report block with a single write instead of one print per line.
+    lines = ["AUDITOR_OK", str(json_path)]
+    if md_path is not None:
+        lines.append(str(md_path))
+    lines.extend([
+        "========================================",
+        "POSTMORTEM INTEGRITY AUDIT",
+        f"Incident: {incident_id}",
+        f"Overall Integrity Score: {overall}/100",
+        f"Decision Integrity Score: {decision}/100",
+        f"Confidence Drift: -{confidence_drift}",
+        f"Governance Findings: {gov_count}",
+        "========================================",
+        f"INTEGRITY STATUS: {status}",
+    ])
+    sys.stdout.write("\n".join(lines) + "\n")
 
     if args.store:
         client = get_client()
@@ -1,17 +1,59 @@
 #!/usr/bin/env python3
 """Bulk load NDJSON from data/ into Elasticsearch Serverless (Day 1)."""
-import json
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Tuple
 
 # Allow importing es_client when run as python scripts/bulk_load.py
 sys.path.insert(0, str(Path(__file__).resolve().parent))
 
+from context_contract import governance_summary
 from es_client import ES_INDEX_PREFIX, get_client
+from json_io import loads
 
 # Data dir relative to repo root (parent of scripts/)
 DATA_DIR = Path(__file__).resolve().parent.parent / "data"
 PREFIX = (ES_INDEX_PREFIX or "pmai").strip() or "pmai"
+MAX_WORKERS = 8
+
+
+def load_file(client, path: Path) -> Tuple[int, list]:
+    """Bulk index one NDJSON file; return (action count, item errors). (0, []) if the file is empty."""
+    body = []
+    is_change = False
+    # Parse raw bytes lines directly; no per-line text decode or strip.
+    for line in path.read_bytes().splitlines():
+        if not line or line.isspace():
+            continue
+        obj = loads(line)
+        if "index" in obj:
+            # Action line: replace placeholder in _index
+            idx = obj["index"].get("_index", "")
+            if "{{INDEX_PREFIX}}" in idx:
+                obj["index"]["_index"] = idx.replace("{{INDEX_PREFIX}}", PREFIX)
+            is_change = obj["index"]["_index"].endswith("-changes")
+            body.append(obj)
+        else:
+            # Denormalize the governance suffix so the timeline ES|QL needs no per-change lookup.
+            if is_change and "governance_summary" not in obj:
+                summary = governance_summary(obj)
+                if summary:
+                    obj["governance_summary"] = summary
+            body.append(obj)
+
+    if not body:
+        return 0, []
+
+    resp = client.bulk(body=body, refresh="wait_for")
+    count = len([x for x in body if "index" in x])
+    file_errors = []
+    if resp.get("errors"):
+        for item in resp.get("items", []):
+            idx = item.get("index", {})
+            if "error" in idx:
+                file_errors.append(idx["error"])
+    return count, file_errors
 
 
 def main() -> None:
@@ -21,37 +63,12 @@ def main() -> None:
         print("No .ndjson files in data/", file=sys.stderr)
         sys.exit(1)
 
-    all_errors = []
-    for path in ndjson_files:
-        body = []
-        with open(path, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                obj = json.loads(line)
-                if "index" in obj:
-                    # Action line: replace placeholder in _index
-                    idx = obj["index"].get("_index", "")
-                    if "{{INDEX_PREFIX}}" in idx:
-                        obj["index"]["_index"] = idx.replace("{{INDEX_PREFIX}}", PREFIX)
-                    body.append(obj)
-                else:
-                    body.append(obj)
-
-        if not body:
-            print(f"  {path.name}: 0")
-            continue
-
-        resp = client.bulk(body=body, refresh="wait_for")
-        count = len([x for x in body if "index" in x])
-        file_errors = []
-        if resp.get("errors"):
-            for item in resp.get("items", []):
-                idx = item.get("index", {})
-                if "error" in idx:
-                    file_errors.append(idx["error"])
+    # Files target different indices; overlap their bulk + refresh=wait_for round trips.
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(ndjson_files))) as ex:
+        results = list(ex.map(lambda p: load_file(client, p), ndjson_files))
 
+    all_errors = []
+    for path, (count, file_errors) in zip(ndjson_files, results):
         if file_errors:
             all_errors.extend(file_errors)
             print(f"  {path.name}: {count} (errors: {len(file_errors)})", file=sys.stderr)
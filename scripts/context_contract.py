@@ -1,26 +1,76 @@
 """Shared incident context payload: timeline, ref_set, time_window. Used by narrator and auditor."""
+import functools
 import os
+import re
+import sys
+import time
+from collections import namedtuple
 from pathlib import Path
 from typing import Any, List
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from es_client import ES_ESQL_TIMEOUT
+
 REPO_ROOT = Path(__file__).resolve().parent.parent
 ESQL_PATH = REPO_ROOT / "tools" / "get_incident_context.esql"
+CHANGE_REFS_ESQL_PATH = REPO_ROOT / "tools" / "get_change_refs.esql"
 
 WANT_COLUMNS = ["ts", "kind", "service", "ref", "summary"]
+# One timeline row. Use row._asdict() where a mutable/JSON-serializable dict is needed.
+Row = namedtuple("Row", WANT_COLUMNS)
+
+CHANGE_COLUMNS = ["ref", "approvals_required", "approvals_observed", "change_window"]
+# One Deploy/Rollback change record from get_change_refs.esql; missing fields are None.
+ChangeRecord = namedtuple("ChangeRecord", CHANGE_COLUMNS)
 
 # Default time window if incident doc not found (e.g. INC-1042 demo)
 DEFAULT_START = "2026-02-10T09:58:00Z"
 DEFAULT_END = "2026-02-10T10:40:00Z"
 
 
-def get_incident_time_window(client: Any, incident_id: str) -> tuple[str, str]:
-    """Fetch incident doc from pmai-incidents; return (start_ts, end_ts) from created_at/updated_at.
-    If not found or missing dates, return default window so ES|QL still runs."""
+# Leading keys of a governance suffix "(approvals 1/2, window=..., author=...)" on a change summary.
+_GOVERNANCE_KEYS = ("approvals ", "window=", "author=")
+
+
+def governance_summary(doc: dict) -> str:
+    """Compose "approvals 1/2, window=..., author=..." from a change doc's governance fields ("" if none set).
+    Stored on changes docs at ingest (bulk_load) so the timeline ES|QL returns DEP-* summaries already suffixed."""
+    parts = []
+    approvals_required = doc.get("approvals_required")
+    approvals_observed = doc.get("approvals_observed")
+    change_window = doc.get("change_window")
+    author = doc.get("author")
+    if approvals_required is not None and approvals_observed is not None:
+        parts.append(f"approvals {approvals_observed}/{approvals_required}")
+    if change_window is not None and str(change_window).strip() != "":
+        parts.append(f"window={change_window}")
+    if author is not None and str(author).strip() != "":
+        parts.append(f"author={author}")
+    return ", ".join(parts)
+
+
+def has_governance_suffix(summary: str) -> bool:
+    """True if summary already ends with a " (<governance_summary>)" suffix."""
+    if not summary.endswith(")"):
+        return False
+    i = summary.rfind(" (")
+    return i >= 0 and summary[i + 2:].startswith(_GOVERNANCE_KEYS)
+
+
+# The only incident fields _time_window_from_incident reads; the GET returns nothing else.
+INCIDENT_TW_FIELDS = ["created_at", "updated_at", "@timestamp"]
+
+# (incidents index, incident_id) -> (expires_at, (start_ts, end_ts)). Entries expire after the same 300s as
+# app._cached_incident_context, so an open incident's window still follows updated_at in a long-lived process.
+INCIDENT_TW_CACHE_TTL = 300
+_INCIDENT_TW_CACHE: dict[tuple[str, str], tuple[float, tuple[str, str]]] = {}
+
+
+def _time_window_from_incident(resp: Any) -> tuple[str, str]:
+    """Derive (start_ts, end_ts) from an incidents GET response; default window if not found or missing dates."""
     from datetime import datetime, timedelta
-    prefix = (os.getenv("ES_INDEX_PREFIX") or "pmai").strip() or "pmai"
-    index = f"{prefix}-incidents"
     try:
-        resp = client.get(index=index, id=incident_id, ignore=[404])
         if isinstance(resp, dict):
             found, doc = resp.get("found", False), resp.get("_source") or {}
         else:
@@ -35,8 +85,8 @@ def get_incident_time_window(client: Any, incident_id: str) -> tuple[str, str]:
                 try:
                     start_dt = datetime.fromisoformat(start_s.replace("Z", "+00:00"))
                     end_dt = datetime.fromisoformat(end_s.replace("Z", "+00:00"))
-                    start = (start_dt - timedelta(minutes=5)).strftime("%Y-%m-%dT%H:%M:%SZ")
-                    end = (end_dt + timedelta(minutes=10)).strftime("%Y-%m-%dT%H:%M:%SZ")
+                    start = (start_dt - timedelta(minutes=5)).isoformat(timespec="seconds") + "Z"
+                    end = (end_dt + timedelta(minutes=10)).isoformat(timespec="seconds") + "Z"
                     return start, end
                 except Exception:
                     pass
@@ -45,73 +95,96 @@ def get_incident_time_window(client: Any, incident_id: str) -> tuple[str, str]:
     return DEFAULT_START, DEFAULT_END
 
 
-def _load_esql_query(incident_id: str, start_ts: str, end_ts: str) -> str:
+def get_incident_time_window(client: Any, incident_id: str) -> tuple[str, str]:
+    """Fetch incident doc from pmai-incidents; return (start_ts, end_ts) from created_at/updated_at.
+    If not found or missing dates, return default window so ES|QL still runs.
+    Answers are memoized for INCIDENT_TW_CACHE_TTL seconds (narrator + auditor share one GET); ES errors are not cached."""
+    prefix = (os.getenv("ES_INDEX_PREFIX") or "pmai").strip() or "pmai"
+    index = f"{prefix}-incidents"
+    key = (index, incident_id)
+    now = time.monotonic()
+    cached = _INCIDENT_TW_CACHE.get(key)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+    try:
+        resp = client.options(ignore_status=404).get(index=index, id=incident_id, source_includes=INCIDENT_TW_FIELDS)
+    except Exception:
+        return DEFAULT_START, DEFAULT_END
+    window = _time_window_from_incident(resp)
+    _INCIDENT_TW_CACHE[key] = (now + INCIDENT_TW_CACHE_TTL, window)
+    return window
+
+
+# A blank or //-comment-only line, including its newline.
+_COMMENT_LINE_RE = re.compile(r"^[ \t\r\f\v]*(?://.*)?(?:\n|\Z)", re.MULTILINE)
+
+
+@functools.lru_cache(maxsize=8)
+def _load_esql_template(path: Path, mtime_ns: int) -> str:
+    """Return ES|QL file text with comment and blank lines stripped. mtime_ns is part of the
+    cache key so editing the file invalidates the cached template."""
+    text = path.read_text(encoding="utf-8")
+    return _COMMENT_LINE_RE.sub("", text).rstrip("\r\n")
+
+
+def _load_esql_query(incident_id: str, start_ts: str, end_ts: str, path: Path = ESQL_PATH) -> str:
     """Load ES|QL file, strip comments, replace {{INCIDENT_ID}}, {{INCIDENT_NUM}}, {{START_TIME}}, {{END_TIME}}."""
-    text = ESQL_PATH.read_text(encoding="utf-8")
-    lines = [
-        line
-        for line in text.splitlines()
-        if line.strip() and not line.strip().startswith("//")
-    ]
-    query = "\n".join(lines).replace("{{INCIDENT_ID}}", incident_id)
+    query = _load_esql_template(path, path.stat().st_mtime_ns).replace("{{INCIDENT_ID}}", incident_id)
     incident_num = incident_id.split("-", 1)[-1] if "-" in incident_id else incident_id
     query = query.replace("{{INCIDENT_NUM}}", incident_num)
     query = query.replace("{{START_TIME}}", start_ts).replace("{{END_TIME}}", end_ts)
     return query
 
 
-def _run_esql_timeline(client: Any, query: str, incident_id: str | None = None) -> List[dict]:
-    """Execute ES|QL query and return list of {ts, kind, service, ref, summary}."""
+def _run_esql(client: Any, query: str, incident_id: str | None = None) -> tuple[list, list]:
+    """Execute ES|QL query and return (columns, values) from the response body."""
     try:
-        resp = client.esql.query(query=query)
+        opts = {"request_timeout": ES_ESQL_TIMEOUT}
+        if incident_id:
+            opts["opaque_id"] = f"pmai:{incident_id}"
+        resp = client.options(**opts).esql.query(query=query)
     except Exception as e:
         msg = f"ES|QL query failed for incident {incident_id!r}: {e}" if incident_id else f"ES|QL query failed: {e}"
         raise RuntimeError(msg) from e
     body = getattr(resp, "body", resp) if not isinstance(resp, dict) else resp
     if isinstance(body, dict) and "body" in body and "columns" not in body:
         body = body["body"]
-    columns = body.get("columns", [])
-    values = body.get("values", [])
-    col_names = [c.get("name", "") for c in columns]
-    idx = {name: i for i, name in enumerate(col_names)}
-    indices = [idx.get(w) for w in WANT_COLUMNS]
-    rows = []
-    for row in values:
-        cells = []
-        for i in indices:
-            if i is not None and i < len(row):
-                v = row[i]
-                cells.append(v if v is not None else "")
-            else:
-                cells.append("")
-        rows.append(dict(zip(WANT_COLUMNS, cells)))
-    return rows
-
-
-def build_ref_set(timeline: List[dict]) -> List[str]:
+    return body.get("columns", []), body.get("values", [])
+
+
+def _run_esql_timeline(client: Any, query: str, incident_id: str | None = None) -> List[Row]:
+    """Execute ES|QL query and return list of Row(ts, kind, service, ref, summary)."""
+    columns, values = _run_esql(client, query, incident_id)
+    idx = {c.get("name", ""): i for i, c in enumerate(columns)}
+    indices = tuple(idx.get(w) for w in WANT_COLUMNS)
+    # values rows share the columns' shape, so only absent columns and null cells need defaulting.
+    return [Row(*("" if i is None or row[i] is None else row[i] for i in indices)) for row in values]
+
+
+def build_ref_set(timeline: List[Row]) -> List[str]:
     """Return unique refs from timeline in order of first appearance."""
     seen: set = set()
     out: List[str] = []
     for row in timeline:
-        ref = (row.get("ref") or "").strip()
+        ref = (row.ref or "").strip()
         if ref and ref not in seen:
             seen.add(ref)
             out.append(ref)
     return out
 
 
-def compute_time_window(timeline: List[dict]) -> dict:
+def compute_time_window(timeline: List[Row]) -> dict:
     """Return {start, end} from first and last timeline row ts."""
     if not timeline:
         return {"start": "", "end": ""}
     return {
-        "start": timeline[0].get("ts", ""),
-        "end": timeline[-1].get("ts", ""),
+        "start": timeline[0].ts,
+        "end": timeline[-1].ts,
     }
 
 
 def load_incident_context(client: Any, incident_id: str) -> dict:
-    """Load incident context via ES|QL; return shared payload with timeline, ref_set, time_window.
+    """Load incident context via ES|QL; return shared payload with timeline (list of Row), ref_set, time_window.
     Time window is taken from the incident doc (created_at/updated_at) when present."""
     start_ts, end_ts = get_incident_time_window(client, incident_id)
     query = _load_esql_query(incident_id, start_ts, end_ts)
@@ -122,3 +195,18 @@ def load_incident_context(client: Any, incident_id: str) -> dict:
         "ref_set": build_ref_set(timeline),
         "time_window": compute_time_window(timeline),
     }
+
+
+def load_change_records(client: Any, incident_id: str) -> List[ChangeRecord]:
+    """Return the incident's Deploy/Rollback change records via get_change_refs.esql, in timeline order.
+    Filtering and the governance fields come from ES, so no per-change GET is needed."""
+    start_ts, end_ts = get_incident_time_window(client, incident_id)
+    query = _load_esql_query(incident_id, start_ts, end_ts, CHANGE_REFS_ESQL_PATH)
+    columns, values = _run_esql(client, query, incident_id)
+    idx = {c.get("name", ""): i for i, c in enumerate(columns)}
+    indices = tuple(idx.get(w) for w in CHANGE_COLUMNS)
+    records = (
+        ChangeRecord(*(None if i is None else row[i] for i in indices))
+        for row in values
+    )
+    return [r for r in records if r.ref]
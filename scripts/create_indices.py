@@ -3,7 +3,9 @@
 import argparse
 import json
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import List, Set, Tuple
 
 sys.path.insert(0, str(Path(__file__).resolve().parent))
 
@@ -11,42 +13,89 @@ from es_client import get_client, index_name
 
 MAPPINGS_DIR = Path(__file__).resolve().parent.parent / "mappings"
 REQUEST_TIMEOUT = 60
+MAX_WORKERS = 8
+
+
+def load_mappings(mapping_files: List[Path]) -> List[Tuple[str, dict]]:
+    """Parse every mapping file up front; return [(index name, create body)].
+    A malformed file aborts before any index is deleted or created."""
+    out = []
+    for path in mapping_files:
+        try:
+            raw = json.loads(path.read_bytes())
+            body = {"mappings": raw["mappings"]}
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"  {path.name}: invalid mapping - {e}", file=sys.stderr)
+            sys.exit(1)
+        out.append((index_name(path.stem), body))
+    return out
+
+
+def existing_indices(client, names: List[str]) -> Set[str]:
+    """Return which of names already exist, using one GET for all of them instead of an exists call per index."""
+    resp = client.indices.get(index=",".join(names), ignore_unavailable=True, allow_no_indices=True)
+    return set(resp.keys()) & set(names)
+
+
+def ensure_index(client, idx: str, body: dict, recreate: bool, exists: bool) -> Tuple[bool, List[Tuple[str, bool]]]:
+    """Delete (if recreate) and create one index; an existing index kept as-is gets the mapping's new fields added.
+    exists comes from existing_indices. Returns (ok, [(line, is_error)]) so the caller can print results in mapping
+    order after running indices concurrently."""
+    out = []
+    if recreate:
+        try:
+            # A missing index comes back as a 404 response rather than an exception to string-match.
+            resp = client.options(ignore_status=404).indices.delete(index=idx)
+            if resp.meta.status != 404:
+                out.append((f"  {idx}: deleted", False))
+        except Exception as e:
+            out.append((f"  {idx}: delete error - {e}", True))
+
+    if recreate or not exists:
+        try:
+            client.indices.create(index=idx, body=body)
+            out.append((f"  {idx}: created", False))
+        except Exception as e:
+            out.append((f"  {idx}: create error - {e}", True))
+            return False, out
+    else:
+        try:
+            # Additive only: new fields (e.g. changes.governance_summary) become queryable without deleting data.
+            client.indices.put_mapping(index=idx, body=body["mappings"])
+            out.append((f"  {idx}: exists, mapping updated", False))
+        except Exception as e:
+            out.append((f"  {idx}: mapping update error - {e}", True))
+            return False, out
+    return True, out
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Create indices from mappings/")
-    parser.add_argument("--recreate", action="store_true", help="Delete existing indices then create")
+    parser.add_argument(
+        "--recreate", action="store_true", help="Delete existing indices then create (default: add new mapping fields)"
+    )
     args = parser.parse_args()
 
-    client = get_client()
+    # Index admin calls can outlast the client-wide ES_REQUEST_TIMEOUT; every call below uses this override.
+    client = get_client().options(request_timeout=REQUEST_TIMEOUT)
     mapping_files = sorted(MAPPINGS_DIR.glob("*.json"))
     if not mapping_files:
         print("No .json files in mappings/", file=sys.stderr)
         sys.exit(1)
 
-    for path in mapping_files:
-        base = path.stem
-        idx = index_name(base)
-        raw = json.loads(path.read_text(encoding="utf-8"))
-        body = {"mappings": raw["mappings"]}
-
-        if args.recreate:
-            try:
-                client.indices.delete(index=idx, request_timeout=REQUEST_TIMEOUT)
-                print(f"  {idx}: deleted")
-            except Exception as e:
-                if "index_not_found" not in str(e).lower() and "404" not in str(e).lower():
-                    print(f"  {idx}: delete error - {e}", file=sys.stderr)
-
-        if args.recreate or not client.indices.exists(index=idx, request_timeout=REQUEST_TIMEOUT):
-            try:
-                client.indices.create(index=idx, body=body, request_timeout=REQUEST_TIMEOUT)
-                print(f"  {idx}: created")
-            except Exception as e:
-                print(f"  {idx}: create error - {e}", file=sys.stderr)
-                sys.exit(1)
-        else:
-            print(f"  {idx}: skipped")
+    mappings = load_mappings(mapping_files)
+    existing = set() if args.recreate else existing_indices(client, [idx for idx, _ in mappings])
+    # Indices are independent; overlap their delete/create round trips.
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(mappings))) as ex:
+        results = list(ex.map(lambda m: ensure_index(client, m[0], m[1], args.recreate, m[0] in existing), mappings))
+
+    ok = True
+    for index_ok, lines in results:
+        for line, is_error in lines:
+            print(line, file=sys.stderr if is_error else sys.stdout)
+        ok = ok and index_ok
+    if not ok:
+        sys.exit(1)
 
     print("INDICES_READY")
 
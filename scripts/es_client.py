@@ -6,6 +6,12 @@ import os
 from dotenv import load_dotenv
 from elasticsearch import Elasticsearch
 
+try:
+    # Available when orjson is installed (elasticsearch>=8.13); faster JSON (de)serialization of request/response bodies.
+    from elasticsearch.serializer import OrjsonSerializer
+except ImportError:
+    OrjsonSerializer = None
+
 load_dotenv()
 
 ES_URL = os.getenv("ES_URL")
@@ -22,8 +28,15 @@ def _int_env(name: str, default: int) -> int:
 
 
 ES_REQUEST_TIMEOUT = _int_env("ES_REQUEST_TIMEOUT", 10)
+# Per-call override (via client.options) for id lookups (the change-doc mget fallback), which should fail fast.
+ES_LOOKUP_TIMEOUT = _int_env("ES_LOOKUP_TIMEOUT", 3)
+# Per-call override for ES|QL queries; timeline scans can outlast the client-wide ES_REQUEST_TIMEOUT.
+ES_ESQL_TIMEOUT = _int_env("ES_ESQL_TIMEOUT", 30)
 ES_MAX_RETRIES = _int_env("ES_MAX_RETRIES", 2)
 ES_RETRY_ON_TIMEOUT = os.getenv("ES_RETRY_ON_TIMEOUT", "true").lower() in ("true", "1", "yes")
+ES_HTTP_COMPRESS = os.getenv("ES_HTTP_COMPRESS", "true").lower() in ("true", "1", "yes")
+# Keep-alive pool size; create_indices/bulk_load run up to 8 requests at once on the shared client.
+ES_CONNECTIONS_PER_NODE = _int_env("ES_CONNECTIONS_PER_NODE", 16)
 
 
 def require_env() -> None:
@@ -41,8 +54,14 @@ def require_env() -> None:
 
 @functools.lru_cache(maxsize=1)
 def get_client() -> Elasticsearch:
-    """Return an Elasticsearch client for Serverless (api_key auth, verify_certs from ES_VERIFY_TLS)."""
+    """Return the process-wide Elasticsearch client for Serverless (api_key auth, verify_certs from ES_VERIFY_TLS).
+    Cached so every caller shares one connection pool (ES_CONNECTIONS_PER_NODE keep-alive connections);
+    gzip request/response bodies unless ES_HTTP_COMPRESS=false."""
     require_env()
+    kwargs = {}
+    if OrjsonSerializer is not None:
+        # Also used for application/vnd.elasticsearch+json (compatibility-mode) responses.
+        kwargs["serializers"] = {"application/json": OrjsonSerializer()}
     return Elasticsearch(
         ES_URL,
         api_key=ES_API_KEY,
@@ -50,6 +69,9 @@ def get_client() -> Elasticsearch:
         request_timeout=ES_REQUEST_TIMEOUT,
         max_retries=ES_MAX_RETRIES,
         retry_on_timeout=ES_RETRY_ON_TIMEOUT,
+        http_compress=ES_HTTP_COMPRESS,
+        connections_per_node=ES_CONNECTIONS_PER_NODE,
+        **kwargs,
     )
 
 
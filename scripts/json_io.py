@@ -0,0 +1,41 @@
+"""JSON file I/O for pipeline artifacts. Uses orjson when installed, stdlib json otherwise."""
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Parse JSON from bytes or str. Both parsers accept bytes, so callers can skip the text decode.
+loads = orjson.loads if orjson is not None else json.loads
+
+
+def load_json(path: Path) -> Any:
+    """Parse a JSON file straight from its bytes (no separate text-decode pass)."""
+    return loads(path.read_bytes())
+
+
+def _tmp_path(path: Path) -> Path:
+    return path.with_name(path.name + ".tmp")
+
+
+def atomic_write(path: Path, data: bytes) -> None:
+    """Write bytes to a sibling temp file, then os.replace it over path so readers never see a partial file."""
+    tmp = _tmp_path(path)
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def dump_json(data: Any, path: Path) -> None:
+    """Atomically write data to path as indented JSON without materializing it as one str.
+    orjson encodes straight to bytes; stdlib json.dump streams encoder chunks to the temp file."""
+    if orjson is not None:
+        atomic_write(path, orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        return
+    tmp = _tmp_path(path)
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
@@ -1,81 +1,83 @@
 #!/usr/bin/env python3
 """Run Narrator agent: fetch timeline via ES|QL, call LLM or mock, write postmortem JSON + MD."""
 import argparse
+import functools
 import json
 import os
-import re
 import sys
+from collections import namedtuple
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import List
+from typing import Any, List, Optional
 
 sys.path.insert(0, str(Path(__file__).resolve().parent))
 
-from context_contract import load_incident_context
-from es_client import get_client, index_name
+from context_contract import governance_summary, has_governance_suffix, load_incident_context
+from es_client import ES_LOOKUP_TIMEOUT, get_client, index_name
+from json_io import atomic_write, dump_json
 
 REPO_ROOT = Path(__file__).resolve().parent.parent
 OUT_DIR = REPO_ROOT / "out"
 
 
+CHANGE_DOC_FIELDS = ["approvals_required", "approvals_observed", "change_window", "author"]
+
+
 def enrich_change_summaries(timeline: List[dict], client) -> None:
     """For timeline rows with kind 'change' and ref DEP-*, append governance fields to summary.
-    Safe: missing/404 change doc or unexpected fields do not crash; summary left unchanged."""
-    idx = index_name("changes")
+    Rows from changes docs indexed with governance_summary arrive suffixed from ES|QL and are skipped;
+    the rest (docs loaded without it) are fetched with one mget.
+    Safe: missing/404 change doc, a failed mget or unexpected fields do not crash; summary left unchanged."""
+    dep_rows = []
     for row in timeline:
         if row.get("kind") != "change":
             continue
         ref = (row.get("ref") or "").strip()
-        if not ref.startswith("DEP-"):
-            continue
-        try:
-            doc = client.get(index=idx, id=ref)
-            src = doc.get("_source") if isinstance(doc.get("_source"), dict) else {}
-            if not src:
-                src = {}
-        except Exception:
+        if ref.startswith("DEP-") and not has_governance_suffix(row.get("summary") or ""):
+            dep_rows.append((row, ref))
+    if not dep_rows:
+        return
+    ids = list(dict.fromkeys(ref for _, ref in dep_rows))
+    try:
+        resp = client.options(request_timeout=ES_LOOKUP_TIMEOUT).mget(
+            index=index_name("changes"), ids=ids, source_includes=CHANGE_DOC_FIELDS
+        )
+        docs_by_id = {d.get("_id"): d.get("_source") for d in resp.get("docs") or [] if d.get("found")}
+    except Exception:
+        docs_by_id = {}
+    for row, ref in dep_rows:
+        src = docs_by_id.get(ref)
+        if not isinstance(src, dict):
             continue
-        approvals_required = src.get("approvals_required")
-        approvals_observed = src.get("approvals_observed")
-        change_window = src.get("change_window")
-        author = src.get("author")
-        parts = []
-        if approvals_required is not None and approvals_observed is not None:
-            parts.append(f"approvals {approvals_observed}/{approvals_required}")
-        if change_window is not None and str(change_window).strip() != "":
-            parts.append(f"window={change_window}")
-        if author is not None and str(author).strip() != "":
-            parts.append(f"author={author}")
-        if parts:
-            row["summary"] = (row.get("summary") or "") + " (" + ", ".join(parts) + ")"
-
-
-def _artifact_sort_key(ref: str) -> tuple:
-    """Order: DEP-* first, RB-* second, others last; within group lexicographic."""
-    if ref.startswith("DEP-"):
-        return (0, ref)
-    if ref.startswith("RB-"):
-        return (1, ref)
-    return (2, ref)
+        suffix = governance_summary(src)
+        if suffix:
+            row["summary"] = (row.get("summary") or "") + " (" + suffix + ")"
 
 
 def decision_integrity_artifacts_from_timeline(timeline: List[dict]) -> List[str]:
-    """Return unique DEP-* and RB-* refs from timeline, sorted: DEP-* first, RB-* second, others last; within group lexicographic. No invented refs."""
-    seen = set()
+    """Return unique DEP-* and RB-* refs from timeline, sorted: DEP-* first, RB-* second; within group lexicographic. No invented refs."""
+    dep, rb = set(), set()
     for row in timeline:
         ref = (row.get("ref") or "").strip()
-        if not ref:
-            continue
-        if ref.startswith("DEP-") or ref.startswith("RB-"):
-            seen.add(ref)
-    return sorted(seen, key=_artifact_sort_key)
+        if ref.startswith("DEP-"):
+            dep.add(ref)
+        elif ref.startswith("RB-"):
+            rb.add(ref)
+    return sorted(dep) + sorted(rb)
 
 
+@functools.lru_cache(maxsize=4096)
 def _parse_ts(ts: str) -> datetime | None:
+    """Parse an ISO8601 timestamp (trailing Z allowed); None if unparseable. Cached, since the same window strings recur."""
     try:
-        if ts.endswith("Z"):
-            return datetime.fromisoformat(ts.replace("Z", "+00:00"))
-        return datetime.fromisoformat(ts)
+        # Fast path for the YYYY-MM-DDTHH:MM:SSZ shape ES and the incident docs emit.
+        if len(ts) == 20 and ts[19] == "Z" and ts[10] == "T" and ts[4] == ts[7] == "-" and ts[13] == ts[16] == ":":
+            return datetime(
+                int(ts[0:4]), int(ts[5:7]), int(ts[8:10]),
+                int(ts[11:13]), int(ts[14:16]), int(ts[17:19]),
+                tzinfo=timezone.utc,
+            )
+        return datetime.fromisoformat(ts.replace("Z", "+00:00"))
     except Exception:
         return None
 
@@ -87,97 +89,122 @@ def _duration_minutes(start: str, end: str) -> int:
     return 0
 
 
-def run_mock_narrator(incident_id: str, timeline: list[dict], start_ts: str, end_ts: str) -> dict:
-    """Generate deterministic narrator JSON from timeline heuristics. All evidence_refs exist in timeline."""
-    valid_refs = {r.get("ref") for r in timeline if r.get("ref")}
+# Rollback evidence, in the order claims cite it (only refs present in the timeline are used).
+ROLLBACK_CANDIDATES = ("RB-7781", "CHAT-7781-6", "E-107", "E-108")
+
+# Refs bucketed by the mock narrator's heuristics. Each list holds only refs present in the
+# timeline, in timeline order (rollback in ROLLBACK_CANDIDATES order); treat as read-only.
+TimelineIndex = namedtuple(
+    "TimelineIndex",
+    ["valid_refs", "deploy", "errors", "oncall", "alerts", "firing", "resolved", "rollback", "has_rollback_completion"],
+)
+
+
+def index_timeline(timeline: List[dict]) -> TimelineIndex:
+    """Classify timeline rows into TimelineIndex buckets in a single pass."""
+    seen_refs = set()
+    deploy, errors, oncall, alerts, firing, resolved = [], [], [], [], [], []
+    rollback_seen = set()
+    has_rollback_completion = False
+    for r in timeline:
+        ref = r.get("ref")
+        row_summary = r.get("summary") or ""
+        # Completion evidence: summary contains "Rollback complete" or ref E-108/E-109
+        if "Rollback complete" in row_summary or ref in ("E-108", "E-109"):
+            has_rollback_completion = True
+        if not ref:
+            continue
+        seen_refs.add(ref)
+        if ref in ROLLBACK_CANDIDATES:
+            rollback_seen.add(ref)
+        kind = r.get("kind")
+        if kind == "change":
+            if "deploy" in row_summary.lower():
+                deploy.append(ref)
+        elif kind == "log":
+            # Error logs: 5xx, Circuit breaker, or ERROR in summary (so E-105, E-106, not E-101/E-102)
+            if "5xx" in row_summary or "Circuit breaker" in row_summary or "ERROR" in row_summary:
+                errors.append(ref)
+        elif kind == "chat":
+            # On-call acknowledgement: CHAT-7781-5 only
+            if "Acknowledged" in row_summary:
+                oncall.append(ref)
+        elif kind == "alert":
+            alerts.append(ref)
+            if "Resolved" in row_summary:
+                resolved.append(ref)
+            else:
+                firing.append(ref)
+    return TimelineIndex(
+        valid_refs=frozenset(seen_refs),
+        deploy=deploy,
+        errors=errors,
+        oncall=oncall,
+        alerts=alerts,
+        firing=firing,
+        resolved=resolved,
+        rollback=[x for x in ROLLBACK_CANDIDATES if x in rollback_seen],
+        has_rollback_completion=has_rollback_completion,
+    )
 
-    def only_valid(ref_list: list) -> list:
-        return [x for x in ref_list if x in valid_refs]
 
-    refs = list(valid_refs)
-    deploy_refs = only_valid([r["ref"] for r in timeline if r.get("kind") == "change" and "deploy" in (r.get("summary") or "").lower()])
-    # Error logs: 5xx, Circuit breaker, or ERROR in summary (so E-105, E-106, not E-101/E-102)
-    error_log_refs = only_valid([
-        r["ref"] for r in timeline
-        if r.get("kind") == "log"
-        and ("5xx" in (r.get("summary") or "") or "Circuit breaker" in (r.get("summary") or "") or "ERROR" in (r.get("summary") or ""))
-    ])
-    # On-call acknowledgement: CHAT-7781-5 only
-    oncall_refs = only_valid([r["ref"] for r in timeline if r.get("kind") == "chat" and "Acknowledged" in (r.get("summary") or "")])
-    if not oncall_refs and "CHAT-7781-5" in valid_refs:
+def run_mock_narrator(
+    incident_id: str, timeline: list[dict], start_ts: str, end_ts: str, index: Optional[TimelineIndex] = None
+) -> dict:
+    """Generate deterministic narrator JSON from timeline heuristics. All evidence_refs exist in timeline.
+    Pass index to reuse an index_timeline result instead of re-scanning the timeline."""
+    idx = index if index is not None else index_timeline(timeline)
+    # Every bucket only holds refs seen in the timeline, so evidence_refs
+    # built from them (or from refs) need no further filtering.
+    refs = list(idx.valid_refs)
+    oncall_refs = idx.oncall
+    if not oncall_refs and "CHAT-7781-5" in idx.valid_refs:
         oncall_refs = ["CHAT-7781-5"]
-    # Rollback: RB-7781, CHAT-7781-6, E-107, E-108 (only refs present in timeline)
-    rollback_candidates = ["RB-7781", "CHAT-7781-6", "E-107", "E-108"]
-    rollback_refs = only_valid([r["ref"] for r in timeline if r.get("ref") in rollback_candidates])
-    # Preserve order: RB-7781, CHAT-7781-6, then E-107/E-108
-    rollback_refs = [x for x in rollback_candidates if x in rollback_refs]
-    # Completion evidence: summary contains "Rollback complete" or ref E-108/E-109
-    has_rollback_completion = any(
-        "Rollback complete" in (r.get("summary") or "")
-        or (r.get("ref") or "") in ("E-108", "E-109")
-        for r in timeline
-    )
-    alert_refs = only_valid([r["ref"] for r in timeline if r.get("kind") == "alert"])
-    firing_alerts = only_valid([r["ref"] for r in timeline if r.get("kind") == "alert" and "Resolved" not in (r.get("summary") or "")])
-    resolved_alerts = only_valid([r["ref"] for r in timeline if r.get("kind") == "alert" and "Resolved" in (r.get("summary") or "")])
 
     summary = (
         "A deploy was followed by alerts and error logs; on-call acknowledged and rollback was initiated. "
         "Alerts resolved and recovery was confirmed."
     )
-    if deploy_refs:
+    if idx.deploy:
         summary = (
-            f"Deploy ({deploy_refs[0]}) preceded CPU/5xx alerts and error logs. "
+            f"Deploy ({idx.deploy[0]}) preceded CPU/5xx alerts and error logs. "
             "On-call acknowledged; rollback was initiated and alerts resolved with recovery."
         )
 
     duration = _duration_minutes(start_ts, end_ts)
-    generated_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    generated_at = datetime.now(timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
 
     claims = [
-        {"claim_id": "CLM-001", "statement": "Deploy started within the incident window.", "evidence_refs": deploy_refs[:2] or refs[:1], "confidence": 0.88},
-        {"claim_id": "CLM-002", "statement": "Alerts fired during the incident.", "evidence_refs": firing_alerts[:2] or alert_refs[:2] or refs[:1], "confidence": 0.9},
-        {"claim_id": "CLM-003", "statement": "Error logs indicated 5xx and circuit issues.", "evidence_refs": error_log_refs[:] or refs[:1], "confidence": 0.85},
+        {"claim_id": "CLM-001", "statement": "Deploy started within the incident window.", "evidence_refs": idx.deploy[:2] or refs[:1], "confidence": 0.88},
+        {"claim_id": "CLM-002", "statement": "Alerts fired during the incident.", "evidence_refs": idx.firing[:2] or idx.alerts[:2] or refs[:1], "confidence": 0.9},
+        {"claim_id": "CLM-003", "statement": "Error logs indicated 5xx and circuit issues.", "evidence_refs": idx.errors[:] or refs[:1], "confidence": 0.85},
         {"claim_id": "CLM-004", "statement": "On-call acknowledged and investigated.", "evidence_refs": oncall_refs[:] or refs[:1], "confidence": 0.82},
-        {"claim_id": "CLM-005", "statement": "Rollback was initiated and completed." if has_rollback_completion else "Rollback was initiated.", "evidence_refs": rollback_refs[:] or refs[:1], "confidence": 0.87},
-        {"claim_id": "CLM-006", "statement": "Alerts resolved and service recovered.", "evidence_refs": resolved_alerts[:2] or alert_refs[-2:] or refs[-1:], "confidence": 0.85},
+        {"claim_id": "CLM-005", "statement": "Rollback was initiated and completed." if idx.has_rollback_completion else "Rollback was initiated.", "evidence_refs": idx.rollback[:] or refs[:1], "confidence": 0.87},
+        {"claim_id": "CLM-006", "statement": "Alerts resolved and service recovered.", "evidence_refs": idx.resolved[:2] or idx.alerts[-2:] or refs[-1:], "confidence": 0.85},
     ]
     for c in claims:
-        c["evidence_refs"] = only_valid(c["evidence_refs"])
-        if not c["evidence_refs"] and refs:
-            c["evidence_refs"] = [refs[0]]
         c["confidence"] = min(0.92, max(0.75, c.get("confidence", 0.85)))
 
     # Root cause 1: explicit approvals_required=2, approvals_observed=1, change_window=out_of_window; evidence DEP-7781
-    rc1_refs = only_valid(["DEP-7781"]) or deploy_refs[:1] or refs[:1]
+    rc1_refs = (["DEP-7781"] if "DEP-7781" in idx.valid_refs else idx.deploy[:1]) or refs[:1]
     root_causes = [
         {"cause": "Deploy executed with approvals_required=2, approvals_observed=1, change_window=out_of_window.", "evidence_refs": rc1_refs, "confidence": 0.82},
-        {"cause": "Service degradation (CPU/5xx) following deploy.", "evidence_refs": only_valid((firing_alerts + error_log_refs)[:2]) or refs[:1], "confidence": 0.8},
+        {"cause": "Service degradation (CPU/5xx) following deploy.", "evidence_refs": (idx.firing + idx.errors)[:2] or refs[:1], "confidence": 0.8},
     ]
     for r in root_causes:
-        r["evidence_refs"] = only_valid(r["evidence_refs"])
-        if not r["evidence_refs"] and refs:
-            r["evidence_refs"] = [refs[0]]
         r["confidence"] = min(0.92, max(0.75, r.get("confidence", 0.8)))
 
     decision_hints = [
-        {"hint": "Approvals observed (1) less than required (2); evidence from change record.", "evidence_refs": only_valid(deploy_refs[:1]) or refs[:1], "confidence": 0.78},
-        {"hint": "Change may have been executed outside approved window.", "evidence_refs": only_valid(deploy_refs[:1]) or refs[:1], "confidence": 0.75},
+        {"hint": "Approvals observed (1) less than required (2); evidence from change record.", "evidence_refs": idx.deploy[:1] or refs[:1], "confidence": 0.78},
+        {"hint": "Change may have been executed outside approved window.", "evidence_refs": idx.deploy[:1] or refs[:1], "confidence": 0.75},
     ]
     for h in decision_hints:
-        h["evidence_refs"] = only_valid(h["evidence_refs"])
-        if not h["evidence_refs"] and refs:
-            h["evidence_refs"] = [refs[0]]
         h["confidence"] = min(0.92, max(0.75, h.get("confidence", 0.75)))
 
     followups = [
-        {"action": "Post-mortem and approval policy review.", "owner_role": "sre", "priority": "high", "evidence_refs": only_valid(deploy_refs[:1]) or refs[:1]},
-        {"action": "Verify monitoring and rollback runbooks.", "owner_role": "oncall", "priority": "medium", "evidence_refs": only_valid(alert_refs[:1]) or refs[:1]},
+        {"action": "Post-mortem and approval policy review.", "owner_role": "sre", "priority": "high", "evidence_refs": idx.deploy[:1] or refs[:1]},
+        {"action": "Verify monitoring and rollback runbooks.", "owner_role": "oncall", "priority": "medium", "evidence_refs": idx.alerts[:1] or refs[:1]},
     ]
-    for f in followups:
-        f["evidence_refs"] = only_valid(f["evidence_refs"])
-        if not f["evidence_refs"] and refs:
-            f["evidence_refs"] = [refs[0]]
 
     return {
         "incident_id": incident_id,
@@ -197,16 +224,22 @@ def run_mock_narrator(incident_id: str, timeline: list[dict], start_ts: str, end
     }
 
 
+@functools.lru_cache(maxsize=1)
+def _openai_client(api_key: str):
+    """Return a process-wide OpenAI client so repeated narrator calls reuse its keep-alive connection pool."""
+    from openai import OpenAI
+    return OpenAI(api_key=api_key)
+
+
 def run_openai_narrator(incident_id: str, start_ts: str, end_ts: str, timeline: list[dict]) -> dict | None:
     """Call OpenAI chat completions; return parsed JSON or None on failure."""
-    try:
-        from openai import OpenAI
-    except ImportError:
-        return None
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         return None
-    client = OpenAI(api_key=api_key)
+    try:
+        client = _openai_client(api_key)
+    except ImportError:
+        return None
     timeline_text = "\n".join(
         f"{r.get('ts', '')} | {r.get('kind', '')} | {r.get('service', '')} | {r.get('ref', '')} | {r.get('summary', '')}" for r in timeline
     )
@@ -231,10 +264,9 @@ def run_openai_narrator(incident_id: str, start_ts: str, end_ts: str, timeline:
             messages=[{"role": "user", "content": prompt}],
             response_format={"type": "json_object"},
         )
-        raw = resp.choices[0].message.content
-        # Strip possible markdown
-        raw = re.sub(r"^```(?:json)?\s*", "", raw)
-        raw = re.sub(r"\s*```\s*$", "", raw)
+        raw = resp.choices[0].message.content.strip()
+        # Strip possible markdown fences
+        raw = raw.removeprefix("```json").removeprefix("```").removesuffix("```").strip()
         return json.loads(raw)
     except Exception:
         return None
@@ -251,44 +283,43 @@ def render_markdown(data: dict) -> str:
         "## Impact",
     ]
     impact = data.get("impact", {})
-    lines.append(f"- **User impact:** {impact.get('user_impact', '')}")
-    lines.append(f"- **Duration:** {impact.get('duration_minutes', 0)} minutes")
-    lines.append(f"- **Severity:** {impact.get('severity', '')}")
-    lines.append("")
+    lines.extend([
+        f"- **User impact:** {impact.get('user_impact', '')}",
+        f"- **Duration:** {impact.get('duration_minutes', 0)} minutes",
+        f"- **Severity:** {impact.get('severity', '')}",
+        "",
+    ])
     artifacts = data.get("decision_integrity_artifacts", [])
     if artifacts:
-        lines.append("## Decision integrity artifacts")
+        lines.extend(["## Decision integrity artifacts", ""])
+        lines.extend(f"- {ref}" for ref in artifacts)
         lines.append("")
-        for ref in artifacts:
-            lines.append(f"- {ref}")
-        lines.append("")
-    lines.append("## Timeline")
-    lines.append("| ts | kind | service | ref | summary |")
-    lines.append("| --- | --- | --- | --- | --- |")
-    for row in data.get("timeline", []):
-        lines.append(f"| {row.get('ts', '')} | {row.get('kind', '')} | {row.get('service', '')} | {row.get('ref', '')} | {row.get('summary', '')} |")
-    lines.append("")
-    lines.append("## Claims")
-    lines.append("| claim_id | statement | evidence_refs | confidence |")
-    lines.append("| --- | --- | --- | --- |")
-    for c in data.get("claims", []):
-        refs = ", ".join(c.get("evidence_refs", []))
-        lines.append(f"| {c.get('claim_id', '')} | {c.get('statement', '')} | {refs} | {c.get('confidence', '')} |")
-    lines.append("")
-    lines.append("## Follow-ups")
-    lines.append("| action | owner_role | priority | evidence_refs |")
-    lines.append("| --- | --- | --- | --- |")
-    for f in data.get("followups", []):
-        refs = ", ".join(f.get("evidence_refs", []))
-        lines.append(f"| {f.get('action', '')} | {f.get('owner_role', '')} | {f.get('priority', '')} | {refs} |")
+    lines.extend(["## Timeline", "| ts | kind | service | ref | summary |", "| --- | --- | --- | --- | --- |"])
+    lines.extend(
+        f"| {row.get('ts', '')} | {row.get('kind', '')} | {row.get('service', '')} | {row.get('ref', '')} | {row.get('summary', '')} |"
+        for row in data.get("timeline", [])
+    )
+    lines.extend(["", "## Claims", "| claim_id | statement | evidence_refs | confidence |", "| --- | --- | --- | --- |"])
+    lines.extend(
+        f"| {c.get('claim_id', '')} | {c.get('statement', '')} | {', '.join(c.get('evidence_refs', []))} | {c.get('confidence', '')} |"
+        for c in data.get("claims", [])
+    )
+    lines.extend(["", "## Follow-ups", "| action | owner_role | priority | evidence_refs |", "| --- | --- | --- | --- |"])
+    lines.extend(
+        f"| {f.get('action', '')} | {f.get('owner_role', '')} | {f.get('priority', '')} | {', '.join(f.get('evidence_refs', []))} |"
+        for f in data.get("followups", [])
+    )
     return "\n".join(lines)
 
 
-def run_narrator(incident_id: str, inject_error: bool = False) -> dict:
-    """Run narrator pipeline in-process; return report dict (no file I/O)."""
-    client = get_client()
+def run_narrator(incident_id: str, inject_error: bool = False, client: Any = None) -> dict:
+    """Run narrator pipeline in-process; return report dict (no file I/O).
+    Pass client to reuse one ES client across pipeline steps (default: get_client())."""
+    if client is None:
+        client = get_client()
     context = load_incident_context(client, incident_id)
-    timeline = context["timeline"]
+    # Report rows are enriched in place and serialized, so work on dicts.
+    timeline = [row._asdict() for row in context["timeline"]]
     if not timeline:
         raise ValueError("No timeline rows returned.")
     enrich_change_summaries(timeline, client)
@@ -326,8 +357,8 @@ def main() -> None:
     json_path = OUT_DIR / f"postmortem_{incident_id}.json"
     md_path = OUT_DIR / f"postmortem_{incident_id}.md"
 
-    json_path.write_text(json.dumps(data, indent=2), encoding="utf-8")
-    md_path.write_text(render_markdown(data), encoding="utf-8")
+    dump_json(data, json_path)
+    atomic_write(md_path, render_markdown(data).encode("utf-8"))
 
     print("NARRATOR_OK")
     print(json_path)
@@ -1,47 +1,29 @@
 #!/usr/bin/env python3
 """E2E pipeline: run narrator and auditor in-process, write outputs, print executive summary."""
 import argparse
-import json
 import sys
+from itertools import chain
 from pathlib import Path
+from typing import Any
 
 sys.path.insert(0, str(Path(__file__).resolve().parent))
 
+from json_io import dump_json
+
 REPO_ROOT = Path(__file__).resolve().parent.parent
 OUT_DIR = REPO_ROOT / "out"
 
 
-def _run_narrator(incident_id: str) -> dict:
+def _run_narrator(incident_id: str, inject_error: bool = False, client: Any = None) -> dict:
     """Run narrator pipeline in-process; return report dict."""
-    from context_contract import load_incident_context
-    from es_client import get_client
-    from narrator_runner import (
-        decision_integrity_artifacts_from_timeline,
-        enrich_change_summaries,
-        run_mock_narrator,
-        run_openai_narrator,
-    )
-    client = get_client()
-    context = load_incident_context(client, incident_id)
-    timeline = context["timeline"]
-    if not timeline:
-        raise ValueError("No timeline rows returned")
-    enrich_change_summaries(timeline, client)
-    start_ts = context["time_window"]["start"]
-    end_ts = context["time_window"]["end"]
-    data = run_openai_narrator(incident_id, start_ts, end_ts, timeline)
-    if data is None:
-        data = run_mock_narrator(incident_id, timeline, start_ts, end_ts)
-    data["decision_integrity_artifacts"] = decision_integrity_artifacts_from_timeline(
-        data.get("timeline", [])
-    )
-    return data
-
-
-def _run_audit(incident_id: str, report: dict) -> dict:
+    from narrator_runner import run_narrator
+    return run_narrator(incident_id, inject_error=inject_error, client=client)
+
+
+def _run_audit(incident_id: str, report: dict, client: Any = None) -> dict:
     """Run auditor in-process; return audit dict."""
     from auditor_runner import run_audit
-    return run_audit(incident_id, report)
+    return run_audit(incident_id, report, client=client)
 
 
 def main() -> None:
@@ -50,27 +32,29 @@ def main() -> None:
     args = parser.parse_args()
     incident_id = args.incident
 
-    data = _run_narrator(incident_id)
+    from es_client import get_client
+    # One client (and connection pool) for the narrator and auditor steps.
+    client = get_client()
+    data = _run_narrator(incident_id, client=client)
     OUT_DIR.mkdir(parents=True, exist_ok=True)
     postmortem_path = OUT_DIR / f"postmortem_{incident_id}.json"
-    postmortem_path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    dump_json(data, postmortem_path)
 
-    audit_data = _run_audit(incident_id, data)
+    audit_data = _run_audit(incident_id, data, client=client)
     audit_path = OUT_DIR / f"audit_{incident_id}.json"
-    audit_path.write_text(json.dumps(audit_data, indent=2), encoding="utf-8")
-
-    confidence_drift = round(
-        sum(c.get("confidence_original", 0) - c.get("confidence_adjusted", 0) for c in audit_data["validated_claims"])
-        + sum(c.get("confidence_original", 0) - c.get("confidence_adjusted", 0) for c in audit_data["challenged_claims"]),
-        4,
-    )
-    has_causality_issue = any(
-        f.get("finding_type") == "overstrong_causality"
-        for f in audit_data["integrity_findings"]
-    )
-    causality_strength = 100 if not has_causality_issue else 70
+    dump_json(audit_data, audit_path)
+
+    drift = 0
+    for c in chain(audit_data["validated_claims"], audit_data["challenged_claims"]):
+        drift += c.get("confidence_original", 0) - c.get("confidence_adjusted", 0)
+    confidence_drift = round(drift, 4)
 
     findings = audit_data.get("integrity_findings") or []
+    causality_strength = 100
+    for f in findings:
+        if f.get("finding_type") == "overstrong_causality":
+            causality_strength = 70
+            break
     if findings:
         f = findings[0]
         refs = f.get("evidence_refs") or f.get("related_claim_ids") or []
@@ -79,13 +63,16 @@ def main() -> None:
     else:
         top_finding = "None"
 
-    print("Executive Summary")
-    print("- Incident:", audit_data.get("incident_id", incident_id))
-    print("- Overall Integrity Score:", audit_data.get("overall_integrity_score", 0))
-    print("- Decision Integrity Score:", audit_data.get("decision_integrity_score", 0))
-    print("- Confidence Drift:", -confidence_drift)
-    print("- Causality Strength:", f"{causality_strength}/100")
-    print("- Top Finding:", top_finding)
+    # One write for the whole block rather than a print (and flush on a tty) per line.
+    sys.stdout.write("\n".join([
+        "Executive Summary",
+        f"- Incident: {audit_data.get('incident_id', incident_id)}",
+        f"- Overall Integrity Score: {audit_data.get('overall_integrity_score', 0)}",
+        f"- Decision Integrity Score: {audit_data.get('decision_integrity_score', 0)}",
+        f"- Confidence Drift: {-confidence_drift}",
+        f"- Causality Strength: {causality_strength}/100",
+        f"- Top Finding: {top_finding}",
+    ]) + "\n")
 
 
 if __name__ == "__main__":
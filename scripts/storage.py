@@ -1,5 +1,4 @@
 """Store narrator and auditor artifacts in pmai-postmortem_reports with versioning."""
-import re
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Optional
@@ -8,42 +7,98 @@ sys_path = Path(__file__).resolve().parent
 if str(sys_path) not in __import__("sys").path:
     __import__("sys").path.insert(0, str(sys_path))
 
+from elasticsearch import NotFoundError
+
 from es_client import index_name
 
 INDEX = "postmortem_reports"
+# One doc per {incident_id}:{artifact_type} holding the last issued version number n.
+COUNTER_INDEX = "artifact_counters"
+# floor seeds a new counter from artifacts stored before counters existed.
+_INCREMENT_SCRIPT = "if (ctx._source.n == null || ctx._source.n < params.floor) { ctx._source.n = params.floor } ctx._source.n += 1"
+
+
+# Numeric part of artifact_version ("v12" -> 12). Evaluated server-side so max() orders v10 after v9,
+# which a terms agg ordered by keyword would not.
+_VERSION_NUM_SCRIPT = """
+if (doc.containsKey('artifact_version.keyword') && doc['artifact_version.keyword'].size() == 1) {
+  String v = doc['artifact_version.keyword'].value;
+  if (v.length() > 1 && v.startsWith('v')) {
+    try { emit(Long.parseLong(v.substring(1))); } catch (NumberFormatException e) {}
+  }
+}
+"""
+
+
+def _max_version(client: Any, incident_id: str, artifact_type: str) -> int:
+    """Return the highest stored version number for incident_id + artifact_type (0 if none or no index yet).
+    Computed by a max aggregation; no documents are returned. ES errors propagate."""
+    r = client.search(
+        index=index_name(INDEX),
+        body={
+            "size": 0,
+            "query": {
+                "bool": {
+                    "filter": [
+                        {"term": {"incident_id": incident_id}},
+                        {"term": {"artifact_type": artifact_type}},
+                    ]
+                }
+            },
+            "runtime_mappings": {
+                "artifact_version_num": {"type": "long", "script": {"source": _VERSION_NUM_SCRIPT}}
+            },
+            "aggs": {"max_ver": {"max": {"field": "artifact_version_num"}}},
+        },
+        filter_path="aggregations.max_ver.value",
+        ignore_unavailable=True,
+    )
+    value = ((r.get("aggregations") or {}).get("max_ver") or {}).get("value")
+    return 0 if value is None else int(value)
 
 
 def _next_version(client: Any, incident_id: str, artifact_type: str) -> str:
-    """Query index for existing docs with incident_id + artifact_type; return next version v1, v2, ..."""
-    idx = index_name(INDEX)
-    max_n = 0
+    """Query index for existing docs with incident_id + artifact_type; return next version v1, v2, ...
+    Best effort: v1 if the lookup fails."""
     try:
-        r = client.search(
-            index=idx,
-            body={
-                "size": 100,
-                "query": {
-                    "bool": {
-                        "filter": [
-                            {"term": {"incident_id": incident_id}},
-                            {"term": {"artifact_type": artifact_type}},
-                        ]
-                    }
-                },
-                "_source": ["artifact_version"],
-            },
-        )
-        for hit in (r.get("hits") or {}).get("hits") or []:
-            ver = (hit.get("_source") or {}).get("artifact_version", "")
-            if isinstance(ver, str) and ver.startswith("v"):
-                m = re.match(r"v(\d+)$", ver)
-                if m:
-                    max_n = max(max_n, int(m.group(1)))
+        max_n = _max_version(client, incident_id, artifact_type)
     except Exception:
-        pass
+        max_n = 0
     return f"v{max_n + 1}"
 
 
+def _bump_counter(client: Any, counter_id: str, floor: int, upsert: bool) -> int:
+    """Increment counter doc counter_id (raised to at least floor first) and return its new n.
+    With upsert a missing counter is created; without it a missing counter raises NotFoundError."""
+    kwargs = {"scripted_upsert": True, "upsert": {}} if upsert else {}
+    r = client.update(
+        index=index_name(COUNTER_INDEX),
+        id=counter_id,
+        script={"source": _INCREMENT_SCRIPT, "lang": "painless", "params": {"floor": floor}},
+        source=True,
+        retry_on_conflict=5,
+        **kwargs,
+    )
+    return int(r["get"]["_source"]["n"])
+
+
+def _allocate_version(client: Any, incident_id: str, artifact_type: str) -> str:
+    """Atomically increment the counter for incident_id + artifact_type and return the new version (v1, v2, ...).
+    One update when the counter exists; a missing counter is seeded from the highest stored version.
+    Falls back to the aggregation lookup (_next_version) if the counter index is unusable. A counter is
+    never seeded from a failed lookup, so one ES error cannot pin it below the stored history."""
+    counter_id = f"{incident_id}:{artifact_type}"
+    try:
+        try:
+            n = _bump_counter(client, counter_id, 0, upsert=False)
+        except NotFoundError:
+            floor = _max_version(client, incident_id, artifact_type)
+            n = _bump_counter(client, counter_id, floor, upsert=True)
+    except Exception:
+        return _next_version(client, incident_id, artifact_type)
+    return f"v{n}"
+
+
 def store_artifact(
     client: Any,
     incident_id: str,
@@ -51,10 +106,11 @@ def store_artifact(
     payload: dict,
     version: Optional[str] = None,
 ) -> str:
-    """Store an artifact (narrator_report or audit_report) in pmai-postmortem_reports. Returns document id."""
+    """Store an artifact (narrator_report or audit_report) in pmai-postmortem_reports. Returns document id.
+    Never overwrites: if the version's doc already exists, ES rejects the write (ConflictError)."""
     if version is None:
-        version = _next_version(client, incident_id, artifact_type)
-    generated_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        version = _allocate_version(client, incident_id, artifact_type)
+    generated_at = datetime.now(timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
     doc_id = f"{incident_id}:{artifact_type}:{version}"
     # artifact_version (v1, v2, ...) avoids clash with existing index mapping "version" (long)
     body = {
@@ -64,7 +120,7 @@ def store_artifact(
         "generated_at": generated_at,
         "payload": payload,
     }
-    client.index(index=index_name(INDEX), id=doc_id, document=body)
+    client.index(index=index_name(INDEX), id=doc_id, document=body, op_type="create")
     return doc_id
 
 
@@ -76,10 +132,13 @@ def list_artifacts(client: Any, incident_id: str, size: int = 50) -> list[dict]:
             index=idx,
             body={
                 "size": size,
+                "track_total_hits": False,
                 "query": {"term": {"incident_id": incident_id}},
                 "sort": [{"generated_at": {"order": "desc", "unmapped_type": "date"}}],
                 "_source": ["artifact_type", "artifact_version", "generated_at"],
             },
+            # UI reruns repeat this search; the shard cache is invalidated when new artifacts are refreshed in.
+            request_cache=True,
         )
     except Exception:
         return []
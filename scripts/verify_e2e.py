@@ -9,10 +9,14 @@ INCIDENT_ID = "INC-1042"
 
 
 def main() -> None:
+    from es_client import get_client
     from run_e2e import _run_audit, _run_narrator
 
+    # One client (and connection pool) for both pipeline steps, as in run_e2e.
+    client = get_client()
+
     # 1) Run narrator for INC-1042
-    data = _run_narrator(INCIDENT_ID)
+    data = _run_narrator(INCIDENT_ID, client=client)
 
     # 2) Assert narrator output
     if not data.get("incident_id"):
@@ -28,7 +32,7 @@ def main() -> None:
         sys.exit(1)
 
     # 3) Run auditor using narrator payload
-    audit_data = _run_audit(INCIDENT_ID, data)
+    audit_data = _run_audit(INCIDENT_ID, data, client=client)
 
     # 4) Assert auditor output
     overall = audit_data.get("overall_integrity_score")
@@ -45,18 +49,24 @@ def main() -> None:
             print(f"FAIL: score_breakdown sum {total} != overall_integrity_score {overall}", file=sys.stderr)
             sys.exit(1)
     findings = audit_data.get("integrity_findings") or []
-    gov_with_dep = [
-        f for f in findings
-        if f.get("finding_type") == "governance_violation_detected"
-        and (f.get("evidence_refs") or []) == ["DEP-7781"]
-    ]
+    # One pass: stop at a governance finding citing exactly DEP-7781, else judge the first one.
+    first_gov_refs = None
+    gov_with_dep = False
+    for f in findings:
+        if f.get("finding_type") != "governance_violation_detected":
+            continue
+        refs = f.get("evidence_refs") or []
+        if first_gov_refs is None:
+            first_gov_refs = refs
+        if refs == ["DEP-7781"]:
+            gov_with_dep = True
+            break
     if not gov_with_dep:
         # Allow evidence_refs to contain DEP-7781 (e.g. ["DEP-7781"] or list that includes it)
-        gov_findings = [f for f in findings if f.get("finding_type") == "governance_violation_detected"]
-        if not gov_findings:
+        if first_gov_refs is None:
             print("FAIL: integrity_findings must include governance_violation_detected", file=sys.stderr)
             sys.exit(1)
-        refs = gov_findings[0].get("evidence_refs") or []
+        refs = first_gov_refs
         if "DEP-7781" not in refs:
             print(f"FAIL: governance finding must have evidence_refs containing DEP-7781, got {refs!r}", file=sys.stderr)
             sys.exit(1)